@@ -12,6 +12,7 @@
 #       generate_key_pairs()
 #       send_msg()
 #       recv_msg()
+#       handle_server()
 #       main()
 # 
 #   NOTES :
@@ -33,8 +34,8 @@
 
 
 import rsa
-import socket
 import sys
+import transport
 
 
 def generate_key_pair():
@@ -122,39 +123,42 @@ def recv_msg(socket):
         print("Unable to print out message.")
 
 
-def main():
-    # If client wants to generate keys, do not run socket code.
-    if len(sys.argv) > 1:
-        # If the first arg (the command) is requesting to generate keys...
-        if sys.argv[1] == "generate_key_pair":
-            # Run the respective function.
-            generate_key_pair()
-    
-    # Define socket object with AF_INET (IPv4) family type and SOCK_STREAM (TCP) socket type.
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    # Connect the socket to the server (this computer), on port 8000.
-    s.connect((socket.gethostname(), 8000))
-
+def handle_server(s, args):
     # Tell the client they are connected.
     print(s.recv(1024).decode("utf-8"))
 
     # Checking the command line for arguments.
-    if len(sys.argv) > 1:
+    if len(args) > 0:
         # If the first arg (the command) is requesting to send a message to the server...
-        if sys.argv[1] == "send_msg":
+        if args[0] == "send_msg":
             # Run the respective function with the message to send.
-            s.send(sys.argv[1].encode("utf-8"))
-            send_msg(socket=s, msg=sys.argv[2])
-        elif sys.argv[1] == "recv_msg":
+            s.send(args[0].encode("utf-8"))
+            send_msg(socket=s, msg=args[1])
+        elif args[0] == "recv_msg":
             # Run the respective function.
-            s.send(sys.argv[1].encode("utf-8"))
+            s.send(args[0].encode("utf-8"))
             recv_msg(socket=s)
         # If the first arg (the command) is invalid, let the client know.
         else:
-            s.send(sys.argv[1].encode("utf-8"))
+            s.send(args[0].encode("utf-8"))
             print("Invalid command")
 
 
+def main():
+    # If client wants to generate keys, do not run socket code.
+    if len(sys.argv) > 1:
+        # If the first arg (the command) is requesting to generate keys...
+        if sys.argv[1] == "generate_key_pair":
+            # Run the respective function.
+            generate_key_pair()
+    
+    # Pick the transport (TCP or Unix domain socket) and connect to the server's address.
+    transport_type = transport.get_transport()
+    s = transport.create_connection(transport_type, transport.get_address(transport_type))
+
+    handle_server(s=s, args=sys.argv[1:])
+
+
 # Run the code
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -12,6 +12,7 @@
 #       generate_key_pairs()
 #       send_msg()
 #       recv_msg()
+#       handle_client()
 #       main()
 # 
 #   NOTES :
@@ -33,8 +34,8 @@
 
 
 import rsa
-import socket
 import sys
+import transport
 
 
 def generate_key_pair():
@@ -122,6 +123,28 @@ def recv_msg(c_socket):
         print("Unable to print out message.")
 
 
+def handle_client(client_socket, server_name):
+    # Tell the client they are connected to the server
+    client_socket.send(bytes(f"Connected to server {server_name}.", "utf-8"))
+
+    # Client tells the server what it wants to do.
+    client_request = client_socket.recv(1024).decode("utf-8")
+    if client_request == 'send_msg':              # Receive and process message from client.
+        recv_msg(
+            c_socket = client_socket
+        )
+    elif client_request == 'recv_msg':
+        send_msg(
+            c_socket = client_socket,
+            msg="This is a message from the server!"
+        )
+    else:
+        print(f"Client typed in an invalid command: {client_request}")
+
+    # Close the socket after last request between client and server.
+    client_socket.close()
+
+
 def main():
     # Max size of messages (1,000,000,000)
     HEADERSIZE = 10
@@ -133,12 +156,11 @@ def main():
             # Run the respective function.
             generate_key_pair()
     
-    # Define socket object with AF_INET (IPv4) family type and SOCK_STREAM (TCP) socket type.
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    # Bind the socket to the hostname of this computer, on port 8000.
-    s.bind((socket.gethostname(), 8000))
-    # Add a queue of 1. For demonstration, we will only be using 1 client at a time.
-    s.listen(1)
+    # Pick the transport (TCP or Unix domain socket) and the address to listen on.
+    transport_type = transport.get_transport()
+    address = transport.get_address(transport_type)
+    # Bind the socket to the address, and add a queue of 1. For demonstration, we will only be using 1 client at a time.
+    s = transport.create_server(transport_type, address, backlog=1)
 
     # Checking the command line for arguments.
     if len(sys.argv) > 1:
@@ -147,27 +169,12 @@ def main():
     while True:
         # Accept client socket connections, store client socket object and its source address.
         client_socket, client_address = s.accept()
-        
-        print(f"Connection from {client_address} has been established.")
-        # Tell the client they are connected to the server
-        client_socket.send(bytes(f"Connected to server {socket.gethostname()}:8000.", "utf-8"))
-
-        # Client tells the server what it wants to do.
-        client_request = client_socket.recv(1024).decode("utf-8")
-        if client_request == 'send_msg':              # Receive and process message from client.
-            recv_msg(
-                c_socket = client_socket
-            )
-        elif client_request == 'recv_msg':
-            send_msg(
-                c_socket = client_socket,
-                msg="This is a message from the server!"
-            )
-        else:
-            print(f"Client typed in an invalid command: {client_request}")
-
-        # Close the socket after last request between client and server.
-        client_socket.close()
+
+        print(f"Connection from {client_address or transport_type} has been established.")
+        handle_client(
+            client_socket = client_socket,
+            server_name = transport.describe(s)
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+#
+#   PROJECT : Sending Secure Application Messages
+#
+#   FILENAME : ASYMMETRIC_ONLY/test_asymmetric_only.py
+#
+#   DESCRIPTION :
+#       Runs the client and server of the asymmetric only version inside a
+#       single process, connected through transport.create_socketpair(), so
+#       no network port is needed. Run with: python -m pytest
+#
+#   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
+#
+
+
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+# Both versions have modules with the same names, make sure the ones from this directory are used.
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+for name in ("client", "server", "transport", "scheduler"):
+    sys.modules.pop(name, None)
+
+import client
+import server
+import transport
+
+
+@pytest.fixture(autouse=True)
+def key_directory(monkeypatch):
+    # The .pem files are read from the current directory.
+    monkeypatch.chdir(HERE)
+
+
+def run_in_thread(target, **kwargs):
+    thread = threading.Thread(target=target, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_recv_msg_round_trip(capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair")
+    client.handle_server(s=client_side, args=["recv_msg"])
+    thread.join(30)
+    client_side.close()
+
+    out = capsys.readouterr().out
+    assert "Connected to server socketpair." in out
+    assert "Message confidentiality passed." in out
+    assert "Message integrity & sender authentication passed." in out
+    assert "This is a message from the server!" in out
+
+
+def test_send_msg_round_trip(capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.recv_msg, c_socket=server_side)
+    client.send_msg(socket=client_side, msg="Hello from the client!")
+    thread.join(30)
+    server_side.close()
+    client_side.close()
+
+    out = capsys.readouterr().out
+    assert "Message confidentiality passed." in out
+    assert "Message integrity & sender authentication passed." in out
+    assert "Hello from the client!" in out
+
+
+def test_get_address_rejects_missing_port(monkeypatch):
+    monkeypatch.setenv("SSAM_ADDRESS", "localhost")
+    with pytest.raises(ValueError, match="host:port"):
+        transport.get_address("tcp")
+
+    monkeypatch.setenv("SSAM_ADDRESS", "localhost:9000")
+    assert transport.get_address("tcp") == ("localhost", 9000)
+
+
+@pytest.mark.skipif(not hasattr(transport.socket, "AF_UNIX"), reason="no Unix domain sockets")
+def test_create_server_only_replaces_socket_files(tmp_path):
+    # A regular file at the address must never be deleted.
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(ValueError, match="not a socket"):
+        transport.create_server("unix", str(path))
+    assert path.read_text() == "keep me"
+
+    # A socket file left behind by a previous server is replaced.
+    address = str(tmp_path / "server.sock")
+    transport.create_server("unix", address).close()
+    assert stat.S_ISSOCK(os.stat(address).st_mode)
+    transport.create_server("unix", address).close()
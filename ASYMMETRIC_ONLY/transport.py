@@ -0,0 +1,112 @@
+#
+#   PROJECT : Sending Secure Application Messages
+#
+#   FILENAME : ASYMMETRIC_ONLY/transport.py
+#
+#   DESCRIPTION :
+#       Transport layer used underneath send_msg() and recv_msg(). The client
+#       and server can talk over TCP, over a Unix domain socket when both run
+#       on the same host, or over an in-process socket pair for tests and
+#       benchmarks that should not bind any network port.
+#
+#   FUNCTIONS :
+#       get_transport()
+#       get_address()
+#       create_server()
+#       create_connection()
+#       create_socketpair()
+#       describe()
+#
+#   NOTES :
+#      - The transport is picked with the SSAM_TRANSPORT environment variable
+#        ("tcp" or "unix"), and its address with SSAM_ADDRESS ("host:port" for
+#        TCP, a file path for Unix domain sockets).
+#      - The "socketpair" transport only exists inside a single process, use
+#        create_socketpair() directly to get both ends of the connection.
+#
+#   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
+#
+
+
+import os
+import socket
+import stat
+
+
+# Transports which can be selected through the SSAM_TRANSPORT environment variable.
+TRANSPORTS = ("tcp", "unix")
+
+# Default port and Unix domain socket path used when SSAM_ADDRESS is not set.
+DEFAULT_TCP_PORT = 8000
+DEFAULT_UNIX_PATH = "server.sock"
+
+
+def get_transport():
+    # Read the requested transport, defaulting to TCP like the original version.
+    transport = os.environ.get("SSAM_TRANSPORT", "tcp").lower()
+
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Invalid transport: {transport}")
+    if transport == "unix" and not hasattr(socket, "AF_UNIX"):
+        raise ValueError("Unix domain sockets are not supported on this platform")
+
+    return transport
+
+
+def get_address(transport):
+    address = os.environ.get("SSAM_ADDRESS")
+
+    if transport == "unix":
+        # Unix domain sockets are addressed by a path on the file system.
+        return address or DEFAULT_UNIX_PATH
+
+    # TCP sockets are addressed by a (host, port) tuple, given as "host:port".
+    if not address:
+        return (socket.gethostname(), DEFAULT_TCP_PORT)
+    host, _, port = address.rpartition(":")
+    if not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"Invalid TCP address, expected host:port: {address}")
+    return (host or socket.gethostname(), int(port))
+
+
+def create_server(transport, address, backlog=1):
+    if transport == "unix":
+        # A socket file left behind by a previous server would make bind() fail.
+        # Anything else at that path is left alone, it is most likely a typo in SSAM_ADDRESS.
+        if os.path.exists(address):
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise ValueError(f"Refusing to replace {address}, it is not a socket file")
+            os.unlink(address)
+        # Define socket object with AF_UNIX family type, so no TCP/IP stack is involved.
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        # Define socket object with AF_INET (IPv4) family type and SOCK_STREAM (TCP) socket type.
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    s.bind(address)
+    s.listen(backlog)
+    return s
+
+
+def create_connection(transport, address):
+    if transport == "unix":
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    s.connect(address)
+    return s
+
+
+def create_socketpair():
+    # Two already connected sockets, the first one for the server and the second one for the client.
+    return socket.socketpair()
+
+
+def describe(s):
+    # Human readable name of the address a socket is bound to, used in the connection message.
+    name = s.getsockname()
+
+    if isinstance(name, tuple):
+        return f"{socket.gethostname()}:{name[1]}"
+    return name or "socketpair"
@@ -12,6 +12,7 @@
 #       generate_key_pairs()
 #       send_msg()
 #       recv_msg()
+#       handle_server()
 #       main()
 # 
 #   NOTES :
@@ -34,8 +35,8 @@
 
 from cryptography.fernet import Fernet
 import rsa
-import socket
 import sys
+import transport
 
 
 def generate_key_pair():
@@ -80,24 +81,37 @@ def send_msg(socket, msg):
     encr_symmetric_key = rsa.encrypt(symmetric_key, SERVER_PUB_KEY)
 
     # Finally, send the encrypted message to the server, along with its signed hash digest.
-    socket.send(encr_symmetric_key)
-    socket.recv(1024)   # Get receipt confirmation
-    socket.send(encr_data_block)
-    socket.recv(1024)   # Get receipt confirmation
+    try:
+        transport.send_frame(socket, encr_symmetric_key)
+        transport.recv_frame(socket)   # Get receipt confirmation
+        transport.send_frame(socket, encr_data_block)
+        receipt = transport.recv_frame(socket)   # Get receipt confirmation
+    except ConnectionError:
+        receipt = None
+
+    # The server may have closed the connection, or refused the data block when overloaded.
+    # Return whether the connection can still be used for the next message.
+    if receipt is None:
+        print("Connection to the server was lost, the message was not sent.")
+        return False
+    if receipt.startswith(b"Rejected"):
+        print(f"The server did not accept the message: {receipt.decode('utf-8')}")
+        return True
 
     # Proof message can't be intercepted.
     print("\nIntercepting the data block while in transit would look like this:")
     print(encr_data_block)
     print("\nIntercepting the symmetric key while in transit would look like this:")
     print(hash_digest_signature)
+    return True
 
 
 def recv_msg(socket):
     # Request the encrypted symmetric key and data block, while sending receipt confirmations.
-    encr_symmetric_key = socket.recv(10240)
-    socket.send(bytes(f"Received symmetric key", "utf-8"))
-    encr_data_block = socket.recv(10240)
-    socket.send(bytes(f"Received data block", "utf-8"))
+    encr_symmetric_key = transport.recv_frame(socket)
+    transport.send_frame(socket, bytes(f"Received symmetric key", "utf-8"))
+    encr_data_block = transport.recv_frame(socket)
+    transport.send_frame(socket, bytes(f"Received data block", "utf-8"))
 
     try:
         # NOTE: MESSAGE CONFIDENTIALITY
@@ -136,38 +150,46 @@ def recv_msg(socket):
         print("Unable to print out message.")
 
 
-def main():
-    # If client wants to generate keys, do not run socket code.
-    if len(sys.argv) > 1:
-        # If the first arg (the command) is requesting to generate keys...
-        if sys.argv[1] == "generate_key_pair":
-            # Run the respective function.
-            generate_key_pair()
-    
-    # Define socket object with AF_INET (IPv4) family type and SOCK_STREAM (TCP) socket type.
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    # Connect the socket to the server (this computer), on port 8000.
-    s.connect((socket.gethostname(), 8000))
-
+def handle_server(s, args):
     # Tell the client they are connected.
-    print(s.recv(2048).decode("utf-8"))
+    print(transport.recv_frame(s).decode("utf-8"))
 
     # Checking the command line for arguments.
-    if len(sys.argv) > 1:
+    if len(args) > 0:
         # If the first arg (the command) is requesting to send a message to the server...
-        if sys.argv[1] == "send_msg":
-            # Run the respective function with the message to send.
-            s.send(sys.argv[1].encode("utf-8"))
-            send_msg(socket=s, msg=sys.argv[2])
-        elif sys.argv[1] == "recv_msg":
+        if args[0] == "send_msg":
+            # Run the respective function with each message to send, over the same connection.
+            transport.send_frame(s, args[0].encode("utf-8"))
+            for msg in args[1:]:
+                if not send_msg(socket=s, msg=msg):
+                    break
+        elif args[0] == "recv_msg":
             # Run the respective function.
-            s.send(sys.argv[1].encode("utf-8"))
+            transport.send_frame(s, args[0].encode("utf-8"))
             recv_msg(socket=s)
         # If the first arg (the command) is invalid, let the client know.
         else:
-            s.send(sys.argv[1].encode("utf-8"))
+            transport.send_frame(s, args[0].encode("utf-8"))
             print("Invalid command")
 
+    # Close the connection, letting the server know there are no more messages.
+    s.close()
+
+
+def main():
+    # If client wants to generate keys, do not run socket code.
+    if len(sys.argv) > 1:
+        # If the first arg (the command) is requesting to generate keys...
+        if sys.argv[1] == "generate_key_pair":
+            # Run the respective function.
+            generate_key_pair()
+    
+    # Pick the transport (TCP or Unix domain socket) and connect to the server's address.
+    transport_type = transport.get_transport()
+    s = transport.create_connection(transport_type, transport.get_address(transport_type))
+
+    handle_server(s=s, args=sys.argv[1:])
+
 
 # Run the code
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+#
+#   PROJECT : Sending Secure Application Messages
+#
+#   FILENAME : ASYMMETRIC_SYMETRIC/scheduler.py
+#
+#   DESCRIPTION :
+#       Server-side scheduler deciding in which order the messages received from
+#       several clients are decrypted and verified, so that one large transfer
+#       does not keep the small messages of other clients waiting behind it.
+#
+#   CLASSES :
+#       Scheduler
+#
+#   NOTES :
+#      - Messages are picked with deficit round robin. Each connection with
+#        queued messages gets QUANTUM bytes of credit per round, and a message
+#        is only processed once its connection has saved enough credit for it.
+#        A client sending large messages therefore gets the same share of bytes
+#        as any other client, instead of the same number of messages.
+#      - Every connection has a bounded queue. When it is full, reserve() blocks
+#        the thread reading from that client, so nothing more is read from its
+#        socket until the worker has caught up.
+#      - The total size of the messages reserved or waiting to be processed is
+#        capped by max_inflight_bytes, to keep memory bounded under overload.
+#        A single connection can only hold max_connection_bytes of it, so one
+#        stalled client can't take the whole budget, and connections waiting
+#        for room in the budget are admitted in the order they asked for it.
+#
+#   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
+#
+
+
+from collections import deque
+import itertools
+import threading
+
+
+# Number of messages each connection can have waiting to be processed.
+QUEUE_SIZE = 4
+# Bytes of credit given to each connection per round of the deficit round robin.
+QUANTUM = 64 * 1024
+# Total bytes of messages which can be waiting to be processed at the same time.
+MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+# Share of MAX_INFLIGHT_BYTES a single connection can hold at the same time.
+MAX_CONNECTION_BYTES = MAX_INFLIGHT_BYTES // 4
+
+
+class _Connection:
+    def __init__(self):
+        # Messages received and waiting to be processed, as (item, size) tuples.
+        self.queue = deque()
+        # Messages reserved or queued, and bytes reserved but not submitted yet.
+        self.pending = 0
+        self.reserved_bytes = 0
+        # Bytes reserved, queued or being processed for this connection.
+        self.inflight_bytes = 0
+        # Credit left for the deficit round robin, and whether this round's quantum was given.
+        self.deficit = 0
+        self.has_turn = False
+        self.closed = False
+
+
+class Scheduler:
+    def __init__(self, handler, queue_size=QUEUE_SIZE, quantum=QUANTUM, max_inflight_bytes=MAX_INFLIGHT_BYTES, max_connection_bytes=MAX_CONNECTION_BYTES):
+        # Function called by the worker thread with each submitted item.
+        self.handler = handler
+        self.queue_size = queue_size
+        self.quantum = quantum
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_connection_bytes = min(max_connection_bytes, max_inflight_bytes)
+
+        self._connections = {}
+        # Connections which have at least one message queued, in round robin order.
+        self._active = deque()
+        self._inflight_bytes = 0
+        # Reservations waiting for room in the total budget, admitted first come first served.
+        self._waiting = deque()
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._worker = None
+
+    def start(self):
+        # Run the worker processing the queued messages in the background.
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+    def register(self):
+        # Add a new connection and return the id used for its other calls.
+        with self._cond:
+            conn_id = next(self._ids)
+            self._connections[conn_id] = _Connection()
+            return conn_id
+
+    def unregister(self, conn_id):
+        with self._cond:
+            conn = self._connections[conn_id]
+            # Give back the bytes reserved for messages which will never be submitted.
+            self._inflight_bytes -= conn.reserved_bytes
+            conn.inflight_bytes -= conn.reserved_bytes
+            conn.reserved_bytes = 0
+            conn.closed = True
+            # Keep the connection until its queued messages were processed.
+            if not conn.queue:
+                del self._connections[conn_id]
+            self._cond.notify_all()
+
+    def reserve(self, conn_id, size):
+        # A negative size would give bytes back to the budget instead of taking them.
+        if size < 0:
+            raise ValueError(f"Invalid message size: {size}")
+        # A message bigger than a connection's share of the budget could never be admitted.
+        if size > self.max_connection_bytes:
+            return False
+
+        with self._cond:
+            conn = self._connections[conn_id]
+            # Backpressure: wait for room in the connection's own queue and share of the budget.
+            # Only this connection's messages being processed can make room, so nobody else is held up.
+            while not self._stopped and (
+                conn.pending >= self.queue_size
+                or conn.inflight_bytes + size > self.max_connection_bytes
+            ):
+                self._cond.wait()
+
+            # Then wait for room in the total budget, behind the connections which asked before,
+            # so a large message can't be overtaken forever by smaller ones.
+            ticket = object()
+            self._waiting.append(ticket)
+            try:
+                while not self._stopped and (
+                    self._waiting[0] is not ticket
+                    or self._inflight_bytes + size > self.max_inflight_bytes
+                ):
+                    self._cond.wait()
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            if self._stopped:
+                return False
+
+            conn.pending += 1
+            conn.reserved_bytes += size
+            conn.inflight_bytes += size
+            self._inflight_bytes += size
+            return True
+
+    def submit(self, conn_id, item, size):
+        # Queue a message previously reserved with the same size.
+        with self._cond:
+            conn = self._connections[conn_id]
+            conn.reserved_bytes -= size
+            conn.queue.append((item, size))
+            if len(conn.queue) == 1:
+                self._active.append(conn_id)
+            self._cond.notify_all()
+
+    def _next(self):
+        # Pick the next message with deficit round robin, None once stopped.
+        with self._cond:
+            while True:
+                while not self._active and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return None
+
+                conn_id = self._active[0]
+                conn = self._connections[conn_id]
+                if not conn.has_turn:
+                    conn.deficit += self.quantum
+                    conn.has_turn = True
+
+                item, size = conn.queue[0]
+                if size > conn.deficit:
+                    # Not enough credit yet, the next connection gets its turn.
+                    conn.has_turn = False
+                    self._active.rotate(-1)
+                    continue
+
+                conn.queue.popleft()
+                conn.deficit -= size
+                if not conn.queue:
+                    # An idle connection does not keep its credit for later.
+                    conn.deficit = 0
+                    conn.has_turn = False
+                    self._active.popleft()
+                    if conn.closed:
+                        del self._connections[conn_id]
+                return conn_id, item, size
+
+    def _release(self, conn_id, size):
+        with self._cond:
+            conn = self._connections.get(conn_id)
+            if conn is not None:
+                conn.pending -= 1
+                conn.inflight_bytes -= size
+            self._inflight_bytes -= size
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            picked = self._next()
+            if picked is None:
+                return
+            conn_id, item, size = picked
+            try:
+                self.handler(item)
+            except Exception as e:
+                # One bad message must not stop the worker, every client would stall behind it.
+                print(f"Unable to process message: {e!r}")
+            finally:
+                self._release(conn_id, size)
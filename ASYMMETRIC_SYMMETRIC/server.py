@@ -12,10 +12,14 @@
 #       generate_key_pairs()
 #       send_msg()
 #       recv_msg()
+#       process_msg()
+#       handle_client()
 #       main()
 # 
 #   NOTES :
-#      - ...
+#      - Each client is served by its own thread, while the messages they send
+#        are decrypted and verified one at a time by the Scheduler's worker, so
+#        a large message can't keep the small messages of other clients waiting.
 # 
 #   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
 #
@@ -34,8 +38,18 @@
 
 from cryptography.fernet import Fernet
 import rsa
-import socket
+from scheduler import MAX_CONNECTION_BYTES, Scheduler
 import sys
+import threading
+import transport
+
+
+# Largest symmetric key, receipt or command frame accepted from a client. An encrypted
+# RSA-2048 key is 256 bytes, only the data block is allowed to be larger.
+MAX_CONTROL_FRAME_SIZE = 1024
+# Seconds to wait for a client to send anything, before closing its connection and
+# giving back the bytes reserved for it.
+CLIENT_TIMEOUT = 30
 
 
 def generate_key_pair():
@@ -80,10 +94,10 @@ def send_msg(c_socket, msg):
     encr_symmetric_key = rsa.encrypt(symmetric_key, CLIENT_PUB_KEY)
 
     # Finally, send the encrypted message to the server, along with its signed hash digest.
-    c_socket.send(encr_symmetric_key)
-    c_socket.recv(1024)   # Get receipt confirmation
-    c_socket.send(encr_data_block)
-    c_socket.recv(1024)   # Get receipt confirmation
+    transport.send_frame(c_socket, encr_symmetric_key)
+    transport.recv_frame(c_socket, max_size=MAX_CONTROL_FRAME_SIZE)   # Get receipt confirmation
+    transport.send_frame(c_socket, encr_data_block)
+    transport.recv_frame(c_socket, max_size=MAX_CONTROL_FRAME_SIZE)   # Get receipt confirmation
 
     # Proof message can't be intercepted.
     print("\nIntercepting the data block while in transit would look like this:")
@@ -92,13 +106,44 @@ def send_msg(c_socket, msg):
     print(hash_digest_signature)
 
 
-def recv_msg(c_socket):
-    # Request the encrypted symmetric key and data block, while sending receipt confirmations.
-    encr_symmetric_key = c_socket.recv(10240)
-    c_socket.send(bytes(f"Received symmetric key", "utf-8"))
-    encr_data_block = c_socket.recv(10240)
-    c_socket.send(bytes(f"Received data block", "utf-8"))
+def recv_msg(c_socket, scheduler=None, conn_id=None):
+    # Request the encrypted symmetric key, None means the client has no more messages to send.
+    encr_symmetric_key = transport.recv_frame(c_socket, max_size=MAX_CONTROL_FRAME_SIZE)
+    if encr_symmetric_key is None:
+        return False
+    transport.send_frame(c_socket, bytes(f"Received symmetric key", "utf-8"))
 
+    # Read the size of the data block first, and wait until the scheduler has room for it.
+    # Until then, nothing more is read from this client's socket.
+    size = transport.recv_frame_size(c_socket)
+    if size is None:
+        return False
+    # Without a scheduler, the data block is still bounded like a connection's share of the budget.
+    if scheduler is None:
+        admitted = size <= MAX_CONNECTION_BYTES
+    else:
+        admitted = scheduler.reserve(conn_id, size)
+    if not admitted:
+        # Drop the data block without buffering it, and let the client know it was rejected.
+        print(f"Data block of {size} bytes rejected, the server is overloaded.")
+        if not transport.discard_exact(c_socket, size):
+            return False
+        transport.send_frame(c_socket, bytes(f"Rejected data block of {size} bytes, the server is overloaded.", "utf-8"))
+        return True
+    encr_data_block = transport.recv_exact(c_socket, size)
+    if encr_data_block is None:
+        return False
+    transport.send_frame(c_socket, bytes(f"Received data block", "utf-8"))
+
+    # Decrypt and verify the message now, or let the scheduler decide when.
+    if scheduler is None:
+        process_msg(encr_symmetric_key, encr_data_block)
+    else:
+        scheduler.submit(conn_id, (encr_symmetric_key, encr_data_block), size)
+    return True
+
+
+def process_msg(encr_symmetric_key, encr_data_block):
     try:
         # NOTE: MESSAGE CONFIDENTIALITY
         # Fetch the server's private key.
@@ -136,6 +181,43 @@ def recv_msg(c_socket):
         print("Unable to print out message.")
 
 
+def handle_client(client_socket, server_name, scheduler=None, timeout=CLIENT_TIMEOUT):
+    # A client which stops sending must not hold its reserved bytes forever.
+    client_socket.settimeout(timeout)
+    try:
+        # Tell the client they are connected to the server
+        transport.send_frame(client_socket, bytes(f"Connected to server {server_name}.", "utf-8"))
+
+        # Client tells the server what it wants to do.
+        client_request = (transport.recv_frame(client_socket, max_size=MAX_CONTROL_FRAME_SIZE) or b"").decode("utf-8")
+        if client_request == 'send_msg':              # Receive and process messages from client.
+            conn_id = scheduler.register() if scheduler is not None else None
+            try:
+                # Keep receiving until the client closes its side of the connection.
+                while recv_msg(
+                    c_socket = client_socket,
+                    scheduler = scheduler,
+                    conn_id = conn_id
+                ):
+                    pass
+            finally:
+                if scheduler is not None:
+                    scheduler.unregister(conn_id)
+        elif client_request == 'recv_msg':
+            send_msg(
+                c_socket = client_socket,
+                msg="This is a message from the server!"
+            )
+        else:
+            print(f"Client typed in an invalid command: {client_request}")
+    except (OSError, ValueError) as e:
+        # A timeout, or a malformed or oversized frame, is handled like the client closing the connection.
+        print(f"Connection with client closed: {e}")
+    finally:
+        # Close the socket after last request between client and server.
+        client_socket.close()
+
+
 def main():
     # Checking the command line for arguments.
     if len(sys.argv) > 1:
@@ -144,12 +226,15 @@ def main():
             # Run the respective function.
             generate_key_pair()
     
-    # Define socket object with AF_INET (IPv4) family type and SOCK_STREAM (TCP) socket type.
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    # Bind the socket to the hostname of this computer, on port 8000.
-    s.bind((socket.gethostname(), 8000))
-    # Add a queue of 1. For demonstration, we will only be using 1 client at a time.
-    s.listen(1)
+    # Pick the transport (TCP or Unix domain socket) and the address to listen on.
+    transport_type = transport.get_transport()
+    address = transport.get_address(transport_type)
+    # Bind the socket to the address, and add a queue of 5 clients waiting to be accepted.
+    s = transport.create_server(transport_type, address, backlog=5)
+
+    # Start the scheduler processing the messages received from all clients.
+    scheduler = Scheduler(handler=lambda encr_msg: process_msg(*encr_msg))
+    scheduler.start()
 
     # Checking the command line for arguments.
     if len(sys.argv) > 1:
@@ -158,27 +243,18 @@ def main():
     while True:
         # Accept client socket connections, store client socket object and its source address.
         client_socket, client_address = s.accept()
-        
-        print(f"Connection from {client_address} has been established.")
-        # Tell the client they are connected to the server
-        client_socket.send(bytes(f"Connected to server {socket.gethostname()}:{s.getsockname()[1]}.", "utf-8"))
-
-        # Client tells the server what it wants to do.
-        client_request = client_socket.recv(1024).decode("utf-8")
-        if client_request == 'send_msg':              # Receive and process message from client.
-            recv_msg(
-                c_socket = client_socket
-            )
-        elif client_request == 'recv_msg':
-            send_msg(
-                c_socket = client_socket,
-                msg="This is a message from the server!"
-            )
-        else:
-            print(f"Client typed in an invalid command: {client_request}")
 
-        # Close the socket after last request between client and server.
-        client_socket.close()
+        print(f"Connection from {client_address or transport_type} has been established.")
+        # Serve each client in its own thread, so several clients can send at the same time.
+        threading.Thread(
+            target=handle_client,
+            kwargs={
+                "client_socket": client_socket,
+                "server_name": transport.describe(s),
+                "scheduler": scheduler
+            },
+            daemon=True
+        ).start()
 
 
 if __name__ == "__main__":
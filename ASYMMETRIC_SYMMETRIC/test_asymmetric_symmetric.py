@@ -0,0 +1,250 @@
+#
+#   PROJECT : Sending Secure Application Messages
+#
+#   FILENAME : ASYMMETRIC_SYMETRIC/test_asymmetric_symmetric.py
+#
+#   DESCRIPTION :
+#       Runs the client and server of the asymmetric & symmetric version inside a
+#       single process, connected through transport.create_socketpair(), so
+#       no network port is needed. Run with: python -m pytest
+#
+#   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
+#
+
+
+import os
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+# Both versions have modules with the same names, make sure the ones from this directory are used.
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+for name in ("client", "server", "transport", "scheduler"):
+    sys.modules.pop(name, None)
+
+import client
+import scheduler as scheduler_module
+from scheduler import Scheduler
+import server
+import transport
+
+
+@pytest.fixture(autouse=True)
+def key_directory(monkeypatch):
+    # The .pem files are read from the current directory.
+    monkeypatch.chdir(HERE)
+
+
+def run_in_thread(target, **kwargs):
+    thread = threading.Thread(target=target, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_recv_msg_round_trip(capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair")
+    client.handle_server(s=client_side, args=["recv_msg"])
+    thread.join(30)
+    client_side.close()
+
+    out = capsys.readouterr().out
+    assert "Connected to server socketpair." in out
+    assert "Message confidentiality passed." in out
+    assert "Message integrity & sender authentication passed." in out
+    assert "This is a message from the server!" in out
+
+
+def test_send_msg_round_trip(capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair")
+    client.handle_server(s=client_side, args=["send_msg", "Hello from the client!", "And a second one."])
+    thread.join(30)
+
+    out = capsys.readouterr().out
+    assert out.count("Message integrity & sender authentication passed.") == 2
+    assert "Hello from the client!" in out
+    assert "And a second one." in out
+
+
+def test_send_msg_through_scheduler(capsys):
+    processed = threading.Semaphore(0)
+
+    def handler(encr_msg):
+        server.process_msg(*encr_msg)
+        processed.release()
+
+    scheduler = Scheduler(handler=handler)
+    scheduler.start()
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair", scheduler=scheduler)
+    client.handle_server(s=client_side, args=["send_msg", "x" * 3_000_000, "small"])
+    thread.join(30)
+    # Messages are processed by the scheduler's worker, after the client is done sending.
+    assert processed.acquire(timeout=30) and processed.acquire(timeout=30)
+    scheduler.stop()
+
+    out = capsys.readouterr().out
+    assert out.count("Message integrity & sender authentication passed.") == 2
+    assert "small" in out
+
+
+def test_rejected_data_block_is_reported_to_client(capsys):
+    # No data block fits in the budget, every message gets rejected.
+    scheduler = Scheduler(handler=lambda encr_msg: server.process_msg(*encr_msg), max_inflight_bytes=10)
+    scheduler.start()
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair", scheduler=scheduler)
+    client.handle_server(s=client_side, args=["send_msg", "x" * 1_000_000, "second"])
+    thread.join(30)
+    scheduler.stop()
+
+    out = capsys.readouterr().out
+    assert out.count("The server did not accept the message: Rejected data block") == 2
+    assert "Message confidentiality passed." not in out
+
+
+def stall_after_header(client_side, size):
+    # Act as a client which announces a data block, then never sends it.
+    transport.recv_frame(client_side)
+    transport.send_frame(client_side, b"send_msg")
+    transport.send_frame(client_side, b"k" * 256)
+    transport.recv_frame(client_side)
+    client_side.sendall(bytes(f"{size:<{transport.HEADERSIZE}}", "utf-8"))
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_stalled_client_does_not_block_other_clients(capsys):
+    scheduler = Scheduler(handler=lambda encr_msg: server.process_msg(*encr_msg))
+    scheduler.start()
+    share = scheduler_module.MAX_CONNECTION_BYTES
+
+    # One client announces a block as large as the whole budget, another one as large as its
+    # share of it, and both stop sending.
+    stalled = []
+    for size in (scheduler_module.MAX_INFLIGHT_BYTES, share):
+        server_side, client_side = transport.create_socketpair()
+        thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair", scheduler=scheduler)
+        stall_after_header(client_side, size)
+        stalled.append((thread, client_side))
+    wait_until(lambda: scheduler._inflight_bytes == share)
+
+    # An honest client still gets its small message through.
+    server_side, client_side = transport.create_socketpair()
+    client_side.settimeout(10)
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair", scheduler=scheduler)
+    client.handle_server(s=client_side, args=["send_msg", "hi"])
+    thread.join(10)
+    assert not thread.is_alive()
+    wait_until(lambda: scheduler._inflight_bytes == share)
+
+    for thread, client_side in stalled:
+        client_side.close()
+        thread.join(10)
+    assert scheduler._inflight_bytes == 0
+    scheduler.stop()
+
+    out = capsys.readouterr().out
+    assert "Data block of 67108864 bytes rejected" in out
+    assert "Message integrity & sender authentication passed.\nhi\n" in out
+
+
+def test_timeout_releases_reserved_bytes(capsys):
+    scheduler = Scheduler(handler=lambda encr_msg: server.process_msg(*encr_msg))
+    scheduler.start()
+    server_side, client_side = transport.create_socketpair()
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair", scheduler=scheduler, timeout=0.5)
+    stall_after_header(client_side, 1000)
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert scheduler._inflight_bytes == 0
+    assert "Connection with client closed" in capsys.readouterr().out
+    scheduler.stop()
+    client_side.close()
+
+
+def test_data_block_is_bounded_without_scheduler(capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair")
+    # Once encrypted, this message is larger than a connection's share of the budget.
+    client.handle_server(s=client_side, args=["send_msg", "x" * 13_000_000])
+    thread.join(30)
+
+    out = capsys.readouterr().out
+    assert "The server did not accept the message: Rejected data block" in out
+    assert "Message confidentiality passed." not in out
+
+
+@pytest.mark.parametrize("frame", [
+    b"abcdefghij",
+    b"-1000     ",
+    # A "symmetric key" far larger than an RSA-2048 ciphertext.
+    bytes(f"{10 ** 6:<{transport.HEADERSIZE}}", "utf-8"),
+])
+def test_bad_frame_closes_connection(frame, capsys):
+    server_side, client_side = transport.create_socketpair()
+    server_side.settimeout(30)
+    client_side.settimeout(30)
+
+    thread = run_in_thread(server.handle_client, client_socket=server_side, server_name="socketpair")
+    transport.recv_frame(client_side)
+    transport.send_frame(client_side, b"send_msg")
+    client_side.sendall(frame)
+    thread.join(30)
+
+    assert not thread.is_alive()
+    assert server_side.fileno() == -1
+    assert "Connection with client closed" in capsys.readouterr().out
+    client_side.close()
+
+
+def test_get_address_rejects_missing_port(monkeypatch):
+    monkeypatch.setenv("SSAM_ADDRESS", "localhost")
+    with pytest.raises(ValueError, match="host:port"):
+        transport.get_address("tcp")
+
+    monkeypatch.setenv("SSAM_ADDRESS", "localhost:9000")
+    assert transport.get_address("tcp") == ("localhost", 9000)
+
+
+@pytest.mark.skipif(not hasattr(transport.socket, "AF_UNIX"), reason="no Unix domain sockets")
+def test_create_server_only_replaces_socket_files(tmp_path):
+    # A regular file at the address must never be deleted.
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(ValueError, match="not a socket"):
+        transport.create_server("unix", str(path))
+    assert path.read_text() == "keep me"
+
+    # A socket file left behind by a previous server is replaced.
+    address = str(tmp_path / "server.sock")
+    transport.create_server("unix", address).close()
+    assert stat.S_ISSOCK(os.stat(address).st_mode)
+    transport.create_server("unix", address).close()
@@ -0,0 +1,208 @@
+#
+#   PROJECT : Sending Secure Application Messages
+#
+#   FILENAME : ASYMMETRIC_SYMETRIC/test_scheduler.py
+#
+#   DESCRIPTION :
+#       Tests of the fair queuing, backpressure and admission limits of the
+#       server's Scheduler. Run with: python -m pytest
+#
+#   AUTHOR(S) : Noah Arcand Da Silva    START DATE : 2022.11.08 (YYYY.MM.DD)
+#
+
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Both versions have modules with the same names, make sure the ones from this directory are used.
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+for name in ("client", "server", "transport", "scheduler"):
+    sys.modules.pop(name, None)
+
+from scheduler import Scheduler
+
+
+class Recorder:
+    # Handler keeping the processed items in order, optionally waiting on a gate first.
+    def __init__(self, gate=None):
+        self.items = []
+        self.gate = gate
+        self.cond = threading.Condition()
+
+    def __call__(self, item):
+        if self.gate is not None:
+            self.gate.wait(10)
+        with self.cond:
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def wait_for(self, count):
+        with self.cond:
+            assert self.cond.wait_for(lambda: len(self.items) >= count, timeout=10)
+        return self.items
+
+
+def queue(scheduler, conn_id, item, size):
+    assert scheduler.reserve(conn_id, size)
+    scheduler.submit(conn_id, item, size)
+
+
+def start_blocked(target, *args):
+    # Run a call which is expected to block, and check it really does.
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    assert thread.is_alive()
+    return thread
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(handler, **kwargs):
+        scheduler = Scheduler(handler, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def test_small_messages_are_not_stuck_behind_large_ones(make_scheduler):
+    recorder = Recorder()
+    scheduler = make_scheduler(recorder, queue_size=3, quantum=100)
+    big, small = scheduler.register(), scheduler.register()
+    for i in range(3):
+        queue(scheduler, big, f"B{i}", 1000)
+    for i in range(3):
+        queue(scheduler, small, f"s{i}", 10)
+
+    scheduler.start()
+    assert recorder.wait_for(6) == ["s0", "s1", "s2", "B0", "B1", "B2"]
+
+
+def test_equal_share_of_bytes(make_scheduler):
+    recorder = Recorder()
+    scheduler = make_scheduler(recorder, queue_size=3, quantum=200)
+    a, b = scheduler.register(), scheduler.register()
+    for i in range(3):
+        queue(scheduler, a, f"a{i}", 200)
+        queue(scheduler, b, f"b{i}", 200)
+
+    scheduler.start()
+    assert recorder.wait_for(6) == ["a0", "b0", "a1", "b1", "a2", "b2"]
+
+
+def test_full_queue_blocks_until_a_message_is_processed(make_scheduler):
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    scheduler = make_scheduler(recorder, queue_size=2)
+    conn_id = scheduler.register()
+    queue(scheduler, conn_id, "m0", 10)
+    queue(scheduler, conn_id, "m1", 10)
+    scheduler.start()
+
+    thread = start_blocked(queue, scheduler, conn_id, "m2", 10)
+    gate.set()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert recorder.wait_for(3) == ["m0", "m1", "m2"]
+
+
+def test_inflight_bytes_are_capped(make_scheduler):
+    scheduler = make_scheduler(Recorder(), max_inflight_bytes=100)
+    a, b = scheduler.register(), scheduler.register()
+
+    # A message larger than the whole budget is rejected right away.
+    assert not scheduler.reserve(a, 101)
+    with pytest.raises(ValueError):
+        scheduler.reserve(a, -1000)
+
+    assert scheduler.reserve(a, 80)
+    thread = start_blocked(scheduler.reserve, b, 30)
+    # Unregistering gives back the bytes reserved for messages never submitted.
+    scheduler.unregister(a)
+    thread.join(10)
+    assert not thread.is_alive()
+    assert scheduler._inflight_bytes == 30
+
+
+def test_connection_can_only_hold_its_share(make_scheduler):
+    scheduler = make_scheduler(Recorder(), max_inflight_bytes=100, max_connection_bytes=50)
+    a, b = scheduler.register(), scheduler.register()
+
+    assert not scheduler.reserve(a, 60)
+    assert scheduler.reserve(a, 40)
+    thread = start_blocked(scheduler.reserve, a, 20)
+    # Another connection is not held up by the one which used its share.
+    assert scheduler.reserve(b, 40)
+
+    scheduler.unregister(a)
+    thread.join(10)
+    assert not thread.is_alive()
+
+
+def test_budget_is_given_first_come_first_served(make_scheduler):
+    scheduler = make_scheduler(Recorder(), max_inflight_bytes=100)
+    a, b, c = scheduler.register(), scheduler.register(), scheduler.register()
+    admitted = []
+
+    def reserve(conn_id, size):
+        assert scheduler.reserve(conn_id, size)
+        admitted.append(conn_id)
+
+    assert scheduler.reserve(a, 60)
+    large = start_blocked(reserve, b, 100)
+    # The small reservation would fit, but must not overtake the large one waiting before it.
+    small = start_blocked(reserve, c, 10)
+
+    scheduler.unregister(a)
+    large.join(10)
+    assert admitted == [b]
+    assert small.is_alive()
+
+    scheduler.unregister(b)
+    small.join(10)
+    assert admitted == [b, c]
+
+
+def test_unregister_keeps_queued_messages(make_scheduler):
+    recorder = Recorder()
+    scheduler = make_scheduler(recorder)
+    conn_id = scheduler.register()
+    queue(scheduler, conn_id, "m0", 10)
+    queue(scheduler, conn_id, "m1", 10)
+    assert scheduler.reserve(conn_id, 10)
+    scheduler.unregister(conn_id)
+
+    scheduler.start()
+    assert recorder.wait_for(2) == ["m0", "m1"]
+    scheduler.stop()
+    assert scheduler._connections == {}
+    assert scheduler._inflight_bytes == 0
+
+
+def test_worker_survives_a_failing_handler(make_scheduler, capsys):
+    recorder = Recorder()
+
+    def handler(item):
+        if item == "bad":
+            raise RuntimeError("broken message")
+        recorder(item)
+
+    scheduler = make_scheduler(handler)
+    conn_id = scheduler.register()
+    queue(scheduler, conn_id, "bad", 10)
+    queue(scheduler, conn_id, "good", 10)
+    scheduler.start()
+
+    assert recorder.wait_for(1) == ["good"]
+    assert scheduler._worker.is_alive()
+    assert "broken message" in capsys.readouterr().out